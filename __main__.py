@@ -1,5 +1,5 @@
 from test import *
-import math
+import os
 
 logging.basicConfig(format='%(asctime)s %(message)s', datefmt='%c', level=logging.DEBUG)
 
@@ -7,22 +7,25 @@ logging.basicConfig(format='%(asctime)s %(message)s', datefmt='%c', level=loggin
 class TestRef:
     def __init__(self, current: Test):
         self.current = current
-        self.cancelled = False
+        self.cancel_event = threading.Event()
 
 
 def battery_recorder(test_ref: TestRef):
-    log = open("record.log", "a")
-    log.write("----Battery Duration Test----\n")
-    log.write(f"[Start] {time.strftime('%c', time.localtime())}\n")
-    log.flush()
-    start = time.time()
-    while not test_ref.cancelled:
-        log.write(f"+{math.floor(time.time() - start)}s"
-                  f" {psutil.sensors_battery().percent}% {test_ref.current.current_action}\n")
-        log.flush()
-        time.sleep(10)
-    log.write(f"[Cancelled] {time.strftime('%c', time.localtime())}")
-    log.close()
+    # append raw bytes straight to the fd, skipping the text IO stack.
+    # Every line goes to disk right away: the test usually ends with the battery dying,
+    # and the last readings are the result.
+    fd = os.open("record.log", os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    os.write(fd, f"----Battery Duration Test----\n[Start] {time.strftime('%c', time.localtime())}\n".encode())
+    sensors = psutil.sensors_battery
+    monotonic = time.monotonic
+    cancel_event = test_ref.cancel_event
+    start = monotonic()
+    while not cancel_event.is_set():
+        line = f"+{int(monotonic() - start)}s {sensors().percent}% {test_ref.current.current_action}\n"
+        os.write(fd, line.encode())
+        cancel_event.wait(10)
+    os.write(fd, f"[Cancelled] {time.strftime('%c', time.localtime())}".encode())
+    os.close(fd)
 
 
 initialization_test = TestInitialization()
@@ -42,4 +45,5 @@ if __name__ == "__main__":
         go_on = standard_test.carry()
         if not go_on:
             break
-    ref.cancelled = True
+    ref.cancel_event.set()
+    recorder_thread.join()
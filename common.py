@@ -1,14 +1,127 @@
-from typing import Sequence, Optional, Iterable, Callable
+from typing import Sequence, Optional, Iterable, Callable, Tuple
+import functools
+import importlib
 import logging
 import sys
-import pyautogui
 import pyperclip
-import psutil
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _LazyModule:
+    """ Stand-in for a module that's slow to import, imported on first attribute access.
+    pyautogui in particular sets up its display backend on import."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+            # later lookups in this module skip the stand-in
+            globals()[self._name] = self._module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        # settings like pyautogui.PAUSE belong on the real module
+        if attr.startswith("_"):
+            object.__setattr__(self, attr, value)
+        else:
+            setattr(self._load(), attr, value)
+
+
+pyautogui = _LazyModule("pyautogui")
+psutil = _LazyModule("psutil")
+
+# Screen matching libraries, imported by _load_vision on first use.
+# Each stays None if it isn't installed.
+cv2 = None
+numpy = None
+mss = None
+_vision_loaded = False
+
+
+def _load_vision():
+    global cv2, numpy, mss, _vision_loaded
+    if _vision_loaded:
+        return
+    _vision_loaded = True
+    try:
+        import cv2 as _cv2
+        import numpy as _numpy
+        cv2, numpy = _cv2, _numpy
+    except ImportError:
+        # without OpenCV, pyautogui reloads the sample from disk on every locate
+        pass
+    try:
+        import mss as _mss
+        mss = _mss
+    except ImportError:
+        pass
+
 
 IS_WINDOWS = sys.platform == "win32"
 
+logger = logging.getLogger(__name__)
+
+# shared by ClickScreenContent so sample lookups don't start new threads each time
+_CLICK_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="click")
+
+# the screen isn't expected to be resized during a test
+_screen_size = None
+
+
+def screen_size():
+    global _screen_size
+    if _screen_size is None:
+        _screen_size = pyautogui.size()
+    return _screen_size
+
+
+# windows found so far, so repeated lookups don't enumerate every top-level window
+_window_cache = {}
+
+
+def find_window(key: str, matches: Callable[[str], bool]):
+    """Find a window whose title matches, reusing the one cached under key while it still does.
+    Returns None if there's no such window. Windows only."""
+    win = _window_cache.get(key)
+    if win is not None and matches(win.title):
+        return win
+
+    win = next((w for w in pyautogui.getAllWindows() if matches(w.title)), None)
+    if win is None:
+        _window_cache.pop(key, None)
+        return None
+    _window_cache[key] = win
+    return win
+
+
+# MSS contexts aren't thread-safe, so keep one per thread
+_grabber = threading.local()
+
+
+def _grab(region: Optional[Tuple[int, int, int, int]] = None):
+    """Capture the screen, or the (left, top, width, height) part of it, as a BGR array.
+    Requires OpenCV."""
+    if mss is None:
+        return cv2.cvtColor(numpy.array(pyautogui.screenshot(region=region)), cv2.COLOR_RGB2BGR)
+
+    sct = getattr(_grabber, "sct", None)
+    if sct is None:
+        sct = _grabber.sct = mss.mss()
+    if region is None:
+        monitor = sct.monitors[1]
+    else:
+        left, top, width, height = region
+        monitor = {"left": left, "top": top, "width": width, "height": height}
+    return numpy.asarray(sct.grab(monitor))[:, :, :3]
+
 
 class Action:
     """ Symbolize the smallest unit in a test.
@@ -32,31 +145,51 @@ class AutomaticallyPausedAction(Action):
         super().__init__(name)
 
 
+def _steps(actions: Sequence[Action]):
+    """Pair each action with whether it needs the pause before it, worked out once."""
+    return tuple((action, not isinstance(action, AutomaticallyPausedAction)) for action in actions)
+
+
 class Test:
     """ Symbolize a test project.
     Use predefined classes preferably.
     """
 
+    # failing actions, with no clean run in between, before the test gives up
+    max_failures = 5
+
     def __init__(self, name: str, actions: Iterable[Action]):
         self.name = name
-        self.actions = actions
+        self.actions = tuple(actions)
+        self._steps = _steps(self.actions)
         self.current_action = None
+        self._failures = 0
 
     def carry(self):
-        logging.debug(f"------{self}------")
-        for action in self.actions:
+        logger.debug("------%s------", self)
+        errored = False
+        for action, needs_pause in self._steps:
             try:
                 self.current_action = action
-                if action is not AutomaticallyPausedAction:
-                    Pause(pyautogui.PAUSE).execute()
+                if needs_pause:
+                    time.sleep(pyautogui.PAUSE)
 
-                logging.debug(f"[{self}] Action: {action}")
+                logger.debug("[%s] Action: %s", self, action)
                 action.execute()
             except pyautogui.FailSafeException as e:
-                logging.debug(f"Test cancelled. Cause: {e}")
+                logger.debug("Test cancelled. Cause: %s", e)
                 return False
             except Exception as e:
-                logging.warning(f"Error while carrying out {self}: {e}")
+                logger.warning("Error while carrying out %s: %s", self, e)
+                errored = True
+                self._failures += 1
+                if self._failures >= self.max_failures:
+                    logger.warning("Test cancelled after %d failures without a clean run.", self._failures)
+                    return False
+                # back off, so a broken state doesn't spin on the same error
+                time.sleep(min(2 ** self._failures, 30))
+        if not errored:
+            self._failures = 0
         return True
 
     def __str__(self):
@@ -68,26 +201,56 @@ class Pause(Action):
         super().__init__("pause")
         self.amount = amount
 
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def of(cls, amount: float):
+        """Shared instance for the amount.
+        A pause keeps no state, so the same one can sit in any number of places."""
+        return cls(amount)
+
     def execute(self):
         time.sleep(self.amount)
 
 
 # Flow Control
 class Loop(AutomaticallyPausedAction):
-    """ Symbolize a loop, where actions are executed repeatedly in order."""
+    """ Symbolize a loop, where actions are executed repeatedly in order.
+    It runs until any of its stop events is set.
+    """
 
-    def __init__(self, actions: Iterable[Action]):
+    def __init__(self, actions: Iterable[Action], stop_event: Optional[threading.Event] = None):
         super().__init__("loop")
-        self.actions = actions
+        self.actions = tuple(actions)
+        self._steps = _steps(self.actions)
+        # also holds the cancel events of the timer loops this one is nested in
+        self.stop_events = [] if stop_event is None else [stop_event]
+
+    def stopped(self):
+        return any(event.is_set() for event in self.stop_events)
 
     def execute(self):
+        steps = self._steps
         while True:
-            for action in self.actions:
+            for action, needs_pause in steps:
+                if self.stopped():
+                    return
+                if needs_pause:
+                    time.sleep(pyautogui.PAUSE)
                 action.execute()
 
 
+def _nested_loops(actions: Iterable[Action]):
+    """Loops anywhere under the given actions, looking into batches and other loops."""
+    for action in actions:
+        if isinstance(action, Loop):
+            yield action
+        yield from _nested_loops(getattr(action, "actions", ()))
+
+
 class TimerLoop(Loop):
-    """ Symbolize a loop that exits after a certain period of time."""
+    """ Symbolize a loop that exits after a certain period of time.
+    Loops nested in it are stopped as well once the time is up.
+    """
 
     def __init__(self, name: str, actions: Iterable[Action], timeout: float,
                  should_not_stop_when: Iterable[str] = None):
@@ -97,40 +260,45 @@ class TimerLoop(Loop):
         self.name = name
         self.timeout = timeout
         self.should_not_stop_when = should_not_stop_when
-        self.cancelled = False
+
+        # set when the time is up, watched by nested loops
+        self.cancel_event = threading.Event()
+        nested = list(_nested_loops(self.actions))
+        for loop in nested:
+            loop.stop_events.append(self.cancel_event)
+        self._watched = len(nested) > 0
 
     def execute(self):
         if self.timeout <= 0:
             return
-        time_start = time.time()
-
-        def take(a: Action, timeout: float):
-            def execute():
-                try:
-                    a.execute()
-                except pyautogui.FailSafeException:
-                    self.cancelled = True
-
-            if a is not AutomaticallyPausedAction:
-                time.sleep(pyautogui.PAUSE)
-
-            t = threading.Thread(target=execute)
-            t.start()
-            logging.debug(f"\t[.loop] Action: {a}")
-            t.join(timeout)
-            if self.cancelled:
-                raise pyautogui.FailSafeException()
-
-            if t.is_alive():
-                t.join()
-                if a.name not in self.should_not_stop_when:
-                    return False
-            return True
-
-        while True:
-            for action in self.actions:
-                if not take(action, self.timeout - time.time() + time_start):
-                    return
+        deadline = time.monotonic() + self.timeout
+
+        log_enabled = logger.isEnabledFor(logging.DEBUG)
+        timer = None
+        if self._watched:
+            # a previous run's timer may have fired after its cleanup
+            self.cancel_event.clear()
+            timer = threading.Timer(self.timeout, self.cancel_event.set)
+            timer.daemon = True
+            timer.start()
+        try:
+            while True:
+                for action, needs_pause in self._steps:
+                    if self.stopped():
+                        return
+                    if needs_pause:
+                        time.sleep(pyautogui.PAUSE)
+
+                    if log_enabled:
+                        logger.debug("\t[.loop] Action: %s", action)
+                    action.execute()
+                    # an action that ran past the deadline ends the loop, unless it's meant to be carried through
+                    if time.monotonic() >= deadline and action.name not in self.should_not_stop_when:
+                        return
+        finally:
+            if timer is not None:
+                timer.cancel()
+                self.cancel_event.clear()
 
     def __str__(self):
         return f"loop(name={self.name}, timeout={self.timeout})"
@@ -141,47 +309,76 @@ class Batch(AutomaticallyPausedAction):
 
     def __init__(self, name: str, actions: Sequence[Action]):
         super().__init__(name)
-        self.actions = actions
+        self.actions = tuple(actions)
 
     def execute(self):
         for action in self.actions:
-            if action is not AutomaticallyPausedAction:
+            if not isinstance(action, AutomaticallyPausedAction):
                 time.sleep(pyautogui.PAUSE)
 
-            logging.debug(f"\t[.batch] Action: {action}")
+            logger.debug("\t[.batch] Action: %s", action)
             action.execute()
 
     def __str__(self):
         return f"{self.name}(stack_size={len(self.actions)})"
 
 
+# (hold, drop) limits of WaitUntilCPUFree, keyed by strictness
+_CPU_FREE_LIMITS = {False: (0.05, 10), True: (0.1, 13)}
+# CPU usage below which the system is considered free right away
+_CPU_IDLE_PERCENT = 8
+
+
 class WaitUntilCPUFree(Action):
     def __init__(self, strict: Optional[bool] = False):
         super().__init__("wait_for_free")
         self.strict = strict
         self.timeout = 10
+        self.max_samples = self.timeout * 2
+        self.hold, self.drop = _CPU_FREE_LIMITS[bool(strict)]
+
+    @staticmethod
+    def _total_time(times) -> float:
+        # guest time is already counted in user/nice on Linux, same as psutil does
+        return sum(times) - getattr(times, "guest", 0) - getattr(times, "guest_nice", 0)
+
+    @staticmethod
+    def _idle_time(times) -> float:
+        return times.idle + getattr(times, "iowait", 0)
+
+    @staticmethod
+    def sample(interval: float) -> float:
+        """CPU usage measured across the interval.
+        The baseline is kept locally instead of in psutil.cpu_percent's shared state,
+        so waits on other threads can't skew it."""
+        before = psutil.cpu_times()
+        while True:
+            time.sleep(interval)
+            after = psutil.cpu_times()
+            total = WaitUntilCPUFree._total_time(after) - WaitUntilCPUFree._total_time(before)
+            # the counters haven't ticked yet, so keep measuring rather than report a bogus 0%
+            if total > 0:
+                break
+
+        idle = WaitUntilCPUFree._idle_time(after) - WaitUntilCPUFree._idle_time(before)
+        return max(0.0, min(100.0, (total - idle) / total * 100))
 
     def execute(self):
         count = 0
-        last = psutil.cpu_percent()
+        hold, drop = self.hold, self.drop
+        last = self.sample(0.1)
         initial = last
         declined = False
-        if self.strict:
-            hold = 0.1
-            drop = 13
-        else:
-            hold = 0.05
-            drop = 10
         while True:
-            time.sleep(0.5)
-            current = psutil.cpu_percent()
+            # blocks for the interval and measures across it, replacing sleep + sample
+            current = self.sample(0.5)
             if not declined and current < last:
                 declined = True
-            elif (declined and (initial - last >= drop or current - last <= hold)) or current < 8:
+            elif (declined and (initial - last >= drop or current - last <= hold)) or current < _CPU_IDLE_PERCENT:
                 break
             count += 1
-            if count > self.timeout * 2:
-                raise TimeoutError(f"CPU usage always high at {psutil.cpu_percent()}%")
+            if count > self.max_samples:
+                raise TimeoutError(f"CPU usage always high at {current}%")
             last = current
 
 
@@ -194,29 +391,84 @@ class Call(Action):
         self.function()
 
 
+class UpdateState(Call, AutomaticallyPausedAction):
+    """ A call that only updates test state without touching the UI,
+    so it doesn't wait for the pause other actions need."""
+
+
 # Common Keys
+# Platform specific sequences, resolved once at import time
+_MOD_KEY = "ctrl" if IS_WINDOWS else "command"
+
+if IS_WINDOWS:
+    def _hit_search():
+        pyautogui.hotkey("win", "s")
+
+    def _quit():
+        pyautogui.hotkey("alt", "f4")
+
+    def _ppt_play():
+        pyautogui.press("f5")
+
+    def _ms_goto(address: str):
+        pyautogui.hotkey("ctrl", "g")
+        pyautogui.write(address)
+        pyautogui.press("enter")
+
+    def _open_app(app_name: str, interval: float):
+        _hit_search()
+        pyautogui.write(app_name, interval)
+        time.sleep(1)
+        pyautogui.press("enter")
+
+    def _wake_qq():
+        win = find_window("qq", lambda title: "qq" in title.lower())
+        if win is None:
+            raise RuntimeError("Failed to activate QQ.")
+        win.activate()
+else:
+    def _hit_search():
+        pyautogui.hotkey("command", "space")
+
+    def _quit():
+        pyautogui.hotkey("command", "q")
+
+    def _ppt_play():
+        pyautogui.hotkey("command", "shift", "enter")
+
+    def _ms_goto(address: str):
+        pyautogui.hotkey("ctrl", "g")
+        time.sleep(0.5)
+        pyautogui.press("tab")
+        pyautogui.write(address)
+        pyautogui.press("enter")
+        time.sleep(0.5)
+
+    def _open_app(app_name: str, interval: float):
+        _hit_search()
+        pyautogui.write(app_name, interval)
+        pyautogui.press("enter")
+
+    def _wake_qq():
+        LaunchQQ().execute()
+
+
 class HitSearchKey(AutomaticallyPausedAction):
     def __init__(self):
         super().__init__("hit_search_key")
 
     def execute(self):
-        if IS_WINDOWS:
-            pyautogui.keyDown("win")
-            pyautogui.press("s")
-            pyautogui.keyUp("win")
-        else:
-            pyautogui.keyDown("command")
-            pyautogui.press("space")
-            pyautogui.keyUp("command")
+        _hit_search()
 
 
 class HitKey(AutomaticallyPausedAction):
-    def __init__(self, key_code: str):
+    def __init__(self, key_code: str, presses: Optional[int] = 1):
         super().__init__(f"hit_{key_code}")
         self.key_code = key_code
+        self.presses = presses
 
     def execute(self):
-        pyautogui.press(self.key_code)
+        pyautogui.press(self.key_code, presses=self.presses)
 
 
 class HitSpaceKey(HitKey):
@@ -239,13 +491,7 @@ class Paste(AutomaticallyPausedAction):
         super().__init__("paste")
 
     def execute(self):
-        if IS_WINDOWS:
-            dec = "ctrl"
-        else:
-            dec = "command"
-        pyautogui.keyDown(dec)
-        pyautogui.press("v")
-        pyautogui.keyUp(dec)
+        pyautogui.hotkey(_MOD_KEY, "v")
 
 
 class OpenApp(AutomaticallyPausedAction):
@@ -255,11 +501,7 @@ class OpenApp(AutomaticallyPausedAction):
         self.interval = interval
 
     def execute(self):
-        HitSearchKey().execute()
-        pyautogui.write(self.app_name, self.interval)
-        if IS_WINDOWS:
-            time.sleep(1)
-        pyautogui.press("enter")
+        _open_app(self.app_name, self.interval)
 
     def __str__(self):
         return f"open_app({self.app_name})"
@@ -280,22 +522,26 @@ class LaunchQQ(OpenApp):
 
 
 class MSLaunch(OpenApp):
-    def __init__(self, app_name: str):
+    def __init__(self, app_name: str, launch_timeout: Optional[float] = 10):
         self.ms_name = app_name
+        self.launch_timeout = launch_timeout
         super().__init__(app_name, 0)
 
     def execute(self):
         super().execute()
         if IS_WINDOWS:
-            # sometimes Windows has task schedule problem
-            WaitUntilCPUFree(strict=True).execute()
-            time.sleep(0.5)
-
-            win = list(filter(lambda x: x.title.lower().endswith(self.ms_name), pyautogui.getAllWindows()))
-
-            if len(win) < 1:
+            # sometimes Windows has task schedule problem,
+            # so wait for the window to show up rather than guessing from CPU usage
+            deadline = time.monotonic() + self.launch_timeout
+            while True:
+                win = find_window(self.ms_name, lambda title: title.lower().endswith(self.ms_name))
+                if win is not None or time.monotonic() >= deadline:
+                    break
+                time.sleep(1)
+
+            if win is None:
                 raise RuntimeError(f"Failed to activate {self.ms_name.title()}.")
-            win[0].activate()
+            win.activate()
 
 
 class LaunchExcel(MSLaunch):
@@ -329,24 +575,19 @@ class MoveCursorRelateToWindow(AutomaticallyPausedAction):
         self.origin = origin
         super().__init__("move_cursor_relatively")
 
+        # origin is fixed, so resolve how each axis is computed up front
+        self._y_fn = {
+            "b": lambda w: w.bottom - self.y,
+            "c": lambda w: w.centery + self.y,
+        }.get(origin[0], lambda w: w.top + self.y)
+        self._x_fn = {
+            "r": lambda w: w.right - self.x,
+            "c": lambda w: w.centerx + self.x,
+        }.get(origin[1], lambda w: w.right + self.x)
+
     def execute(self):
         window = pyautogui.getActiveWindow()
-
-        if self.origin[0] == "b":
-            y = window.bottom - self.y
-        elif self.origin[0] == "c":
-            y = window.centery + self.y
-        else:
-            y = window.top + self.y
-
-        if self.origin[1] == "r":
-            x = window.right - self.x
-        elif self.origin[1] == "c":
-            x = window.centerx + self.x
-        else:
-            x = window.right + self.x
-
-        pyautogui.moveTo(x, y)
+        pyautogui.moveTo(self._x_fn(window), self._y_fn(window))
 
 
 class Click(AutomaticallyPausedAction):
@@ -367,38 +608,91 @@ class ClickPos(AutomaticallyPausedAction):
 
 
 class ClickScreenContent(AutomaticallyPausedAction):
-    def __init__(self, sample_name: str, sample_count: Optional[int] = 1):
+    """ Click where a sample image shows up on screen.
+    Narrow the search with `region` (left, top, width, height) where possible,
+    since template matching cost grows with the area searched.
+    """
+
+    def __init__(self, sample_name: str, sample_count: Optional[int] = 1,
+                 region: Optional[Tuple[int, int, int, int]] = None, grayscale: bool = True,
+                 confidence: float = 0.9):
         super().__init__("click_screen_content")
+        _load_vision()
         self.sample_name = sample_name
+        self.region = region
+        self.grayscale = grayscale
+        self.confidence = confidence
         self.successful = False
         if sample_count:
             self.sample_count = sample_count
         else:
             self.sample_count = 1
 
-    def execute(self):
-        def click_sample(file):
-            pyautogui.click(file)
+        if self.sample_count == 1:
+            files = [f'./samples/{sample_name}.png']
+        else:
+            files = [f'./samples/{sample_name}.{i}.png' for i in range(1, self.sample_count + 1)]
+        if cv2 is not None:
+            flags = cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR
+            self.samples = []
+            for file in files:
+                sample = cv2.imread(file, flags)
+                if sample is None:
+                    raise FileNotFoundError(f"Sample {file} is missing or unreadable.")
+                self.samples.append(sample)
+        else:
+            self.samples = files
+
+    def match_screen(self):
+        """Match the samples against one shared screenshot.
+        Returns the center of the first match, or None."""
+        screen = _grab(self.region)
+        if self.grayscale:
+            screen = cv2.cvtColor(screen, cv2.COLOR_BGR2GRAY)
+        left, top = self.region[:2] if self.region else (0, 0)
+
+        for sample in self.samples:
+            result = cv2.matchTemplate(screen, sample, cv2.TM_CCOEFF_NORMED)
+            _, score, _, (x, y) = cv2.minMaxLoc(result)
+            if score >= self.confidence:
+                height, width = sample.shape[:2]
+                return left + x + width // 2, top + y + height // 2
+        return None
+
+    def locate_samples(self):
+        """Locate the samples without OpenCV.
+        Returns the center of the first match, or None."""
+        def locate(file):
+            try:
+                return pyautogui.locateOnScreen(file, region=self.region, grayscale=self.grayscale)
+            except pyautogui.ImageNotFoundException:
+                # newer pyautogui raises on a miss instead of returning None
+                return None
 
         if self.sample_count == 1:
-            click_sample(f'./samples/{self.sample_name}.png')
+            locations = [locate(self.samples[0])]
         else:
-            threads = []
-            for i in range(1, self.sample_count + 1):
-                t = threading.Thread(target=click_sample, args=[f'./samples/{self.sample_name}.{i}.png'])
-                threads.append(t)
-                t.start()
+            locations = _CLICK_POOL.map(locate, self.samples)
+        for location in locations:
+            if location is not None:
+                return pyautogui.center(location)
+        return None
 
-            for thread in threads:
-                thread.join()
+    def execute(self):
+        if cv2 is not None:
+            target = self.match_screen()
+        else:
+            target = self.locate_samples()
 
+        self.successful = target is not None
         if not self.successful:
             raise IndexError("Target button is missing.")
+        pyautogui.click(target)
 
 
 class ClickCentral(ClickPos):
     def __init__(self):
-        width, height = pyautogui.size()
+        width, height = screen_size()
         super().__init__((width / 2, height / 9))
 
 
@@ -420,14 +714,7 @@ class Quit(AutomaticallyPausedAction):
         super().__init__("quit")
 
     def execute(self):
-        if IS_WINDOWS:
-            pyautogui.keyDown("alt")
-            pyautogui.press("f4")
-            pyautogui.keyUp("alt")
-        else:
-            pyautogui.keyDown("command")
-            pyautogui.press("q")
-            pyautogui.keyUp("command")
+        _quit()
 
 
 class CloseWindow(AutomaticallyPausedAction):
@@ -435,14 +722,7 @@ class CloseWindow(AutomaticallyPausedAction):
         super().__init__("close_window")
 
     def execute(self):
-        if IS_WINDOWS:
-            pyautogui.keyDown("ctrl")
-            pyautogui.press("w")
-            pyautogui.keyUp("ctrl")
-        else:
-            pyautogui.keyDown("command")
-            pyautogui.press("w")
-            pyautogui.keyUp("command")
+        pyautogui.hotkey(_MOD_KEY, "w")
 
 
 # Specific Problems
@@ -451,9 +731,9 @@ class QQLogin(Batch):
         actions = [
             LaunchQQ(),
             WaitUntilCPUFree(),
-            Pause(0.5),
+            Pause.of(0.5),
             HitEnterKey(),
-            Pause(2),
+            Pause.of(2),
             WaitUntilCPUFree(),
         ]
         super().__init__("qq_login", actions)
@@ -465,26 +745,16 @@ class MSGoto(AutomaticallyPausedAction):
         self.address = address
 
     def execute(self):
-        pyautogui.keyDown("ctrl")
-        pyautogui.press("g")
-        pyautogui.keyUp("ctrl")
-        if not IS_WINDOWS:
-            time.sleep(0.5)
-            pyautogui.press("tab")
-        pyautogui.write(self.address)
-        pyautogui.press("enter")
-        if not IS_WINDOWS:
-            time.sleep(0.5)
+        _ms_goto(self.address)
 
 
 class MSOpenRecentDoc(Batch):
     def __init__(self):
         if IS_WINDOWS:
             actions = [
-                HitKey("tab")
-                for _ in range(0, 4)
+                HitKey("tab", presses=4),
+                HitEnterKey()
             ]
-            actions.append(HitEnterKey())
         else:
             actions = [
                 HitKey("tab"),
@@ -495,7 +765,7 @@ class MSOpenRecentDoc(Batch):
 
 class MSPrepare(Batch):
     def __init__(self, app_name: str, basic_actions: Sequence[Action]):
-        self.basic_actions = basic_actions
+        self.basic_actions = tuple(basic_actions)
         self.app_name = app_name
         super().__init__(f"{app_name}_prepare", basic_actions)
 
@@ -513,18 +783,16 @@ class MSPrepare(Batch):
     def execute(self):
         if not self.opened():
             self.actions = self.basic_actions
-        else:
-            actions = []
-            if IS_WINDOWS:
-                win = list(filter(lambda x: x.title.lower().endswith(self.app_name), pyautogui.getAllWindows()))
-                if len(win) < 1:
-                    self.actions = self.basic_actions
-                else:
-                    win[0].activate()
+        elif IS_WINDOWS:
+            win = find_window(self.app_name, lambda title: title.lower().endswith(self.app_name))
+            if win is None:
+                # the window is gone, so prepare from scratch
+                self.actions = self.basic_actions
             else:
-                actions.extend(self.launcher())
-            actions.extend(self.shortcut())
-            self.actions = actions
+                win.activate()
+                self.actions = tuple(self.shortcut())
+        else:
+            self.actions = (*self.launcher(), *self.shortcut())
 
         super().execute()
 
@@ -534,10 +802,10 @@ class ExcelPrepare(MSPrepare):
         actions = [
             LaunchExcel(),
             WaitUntilCPUFree(),
-            Pause(1.3),
+            Pause.of(1.3),
             MSOpenRecentDoc(),
             WaitUntilCPUFree(),
-            Pause(1),
+            Pause.of(1),
             MSGoto("BQ3"),
         ]
         self.current_row = 0
@@ -547,7 +815,7 @@ class ExcelPrepare(MSPrepare):
         def plus():
             self.current_row += 1
 
-        return Call("bump_row_counter", plus)
+        return UpdateState("bump_row_counter", plus)
 
     def opened(self):
         return self.current_row > 0
@@ -564,22 +832,18 @@ class ExcelPrepare(MSPrepare):
 
 
 class ExcelCalc(AutomaticallyPausedAction):
+    columns = ('I', 'O', 'U', 'AA', 'AG', 'AM', 'AS', 'AY', 'BE')
+    # only the row changes between executions
+    _tmpl = "=SUM(" + ",".join(col + "%(row)d" for col in columns) + ")"
+
     def __init__(self, pre: ExcelPrepare):
         super().__init__("excel_calc")
         self.pre = pre
 
     def execute(self):
-        cells = ",".join(
-            [col + str(self.pre.current_row) for col in ['I', 'O', 'U', 'AA', 'AG', 'AM', 'AS', 'AY', 'BE']])
-        expr = f"=SUM({cells})"
-        if IS_WINDOWS:
-            pyautogui.write(expr)
-            time.sleep(0.2)
-        else:
-            pyperclip.copy(expr)
-            pyautogui.keyDown("command")
-            pyautogui.press("v")
-            pyautogui.keyUp("command")
+        expr = self._tmpl % {"row": self.pre.current_row}
+        pyperclip.copy(expr)
+        pyautogui.hotkey(_MOD_KEY, "v")
 
 
 class PPTPlay(AutomaticallyPausedAction):
@@ -587,14 +851,7 @@ class PPTPlay(AutomaticallyPausedAction):
         super().__init__("ppt_play")
 
     def execute(self):
-        if IS_WINDOWS:
-            pyautogui.press("f5")
-        else:
-            pyautogui.keyDown("command")
-            pyautogui.keyDown("shift")
-            pyautogui.press("enter")
-            pyautogui.keyUp("command")
-            pyautogui.keyUp("shift")
+        _ppt_play()
 
 
 class PPTPrepare(MSPrepare):
@@ -602,10 +859,10 @@ class PPTPrepare(MSPrepare):
         actions = [
             LaunchPPT(),
             WaitUntilCPUFree(),
-            Pause(1.3),
+            Pause.of(1.3),
             MSOpenRecentDoc(),
             WaitUntilCPUFree(),
-            Pause(1),
+            Pause.of(1),
             PPTPlay()
         ]
         self.current_slide = 0
@@ -615,7 +872,10 @@ class PPTPrepare(MSPrepare):
         def bump():
             self.current_slide += 1
 
-        return Call("bump_slide_counter", bump)
+        return UpdateState("bump_slide_counter", bump)
+
+    def opened(self):
+        return self.current_slide > 0
 
     def shortcut(self):
         return self.basic_actions[-1:]
@@ -644,14 +904,16 @@ class PPTNext(AutomaticallyPausedAction):
 
 
 class WordTypeNonsense(AutomaticallyPausedAction):
+    # Typed key by key rather than pasted: the typing itself is the workload being measured.
+    text = "Microsoft Word the best IDE on this planet! "
+
     def __init__(self):
         super().__init__("word_typewrite")
 
     def execute(self):
-        pyautogui.write("Microsoft Word the best IDE on this planet! ", 0.08)
-        time.sleep(0.5)
-        pyautogui.write(time.strftime("%Y-%m-%d %H:%M:%S"))
-        pyautogui.press("enter")
+        pyautogui.write(self.text, 0.08)
+        # the timestamp goes out in one burst, ending with the line break
+        pyautogui.write(time.strftime("%Y-%m-%d %H:%M:%S") + "\n")
 
 
 class WordPrepare(MSPrepare):
@@ -659,7 +921,7 @@ class WordPrepare(MSPrepare):
         actions = [
             LaunchWord(),
             WaitUntilCPUFree(),
-            Pause(2),
+            Pause.of(2),
             MSOpenRecentDoc(),
         ]
         self._opened = False
@@ -681,13 +943,7 @@ class OpenNewTab(AutomaticallyPausedAction):
         super().__init__("open_new_tab")
 
     def execute(self):
-        if IS_WINDOWS:
-            dec = "ctrl"
-        else:
-            dec = "command"
-        pyautogui.keyDown(dec)
-        pyautogui.press("t")
-        pyautogui.keyUp(dec)
+        pyautogui.hotkey(_MOD_KEY, "t")
 
 
 class OpenUrl(Batch):
@@ -709,17 +965,18 @@ class OpenUrl(Batch):
 
 class BrowsePage(TimerLoop):
     def __init__(self, timeout: float):
+        if IS_WINDOWS:
+            amount = -400
+        else:
+            amount = -10
+
         def scroll():
-            width, height = pyautogui.size()
-            if IS_WINDOWS:
-                amount = -400
-            else:
-                amount = -10
-            pyautogui.scroll(amount, width / 2, height / 2)
+            width, height = screen_size()
+            pyautogui.scroll(amount, width // 2, height // 2)
 
         actions = [
             Call("scroll", scroll),
-            Pause(1)
+            Pause.of(1)
         ]
         super().__init__("web_browse", actions, timeout)
 
@@ -758,13 +1015,7 @@ class WakeQQ(AutomaticallyPausedAction):
         super().__init__("wake_qq")
 
     def execute(self):
-        if IS_WINDOWS:
-            win = pyautogui.getWindowsWithTitle('QQ')
-            if len(win) < 1:
-                raise RuntimeError("Failed to activate QQ.")
-            win[0].activate()
-        else:
-            LaunchQQ().execute()
+        _wake_qq()
 
 
 class BotChat(Batch):
@@ -774,15 +1025,15 @@ class BotChat(Batch):
             actions = [
                 Type("Bot Testing"),
                 WaitUntilCPUFree(),
-                Pause(1),
+                Pause.of(1),
                 HitEnterKey(),
-                Pause(2),
+                Pause.of(2),
                 loop
             ]
         else:
             actions = [
                 HitKey("b"),
-                Pause(1),
+                Pause.of(1),
                 loop
             ]
         super().__init__("qq_bot_chat", actions)
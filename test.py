@@ -6,6 +6,8 @@ TOTAL_BROWSING_TIME = 600
 BROWSE_PAGES = ["jd.com", "taobao.com", "sina.com.cn", "163.com", "sohu.com", ("ithome.com", 20), ("chiphell.com", 10),
                 ("bbs.nga.cn", 10), ("gamersky.com", 15), ("3dmgame.com", 20), ("4399.com", 23),
                 ("https://www.apple.com.cn/macbook-air-m2/", 80)]
+# (site, duration) for every page, with the default duration filled in
+_PAGES = tuple((page, DEFAULT_BROWSING_TIME) if isinstance(page, str) else page for page in BROWSE_PAGES)
 VIDEO_WATCH_TIME = 600
 QQ_CHAT_TIME = 600
 
@@ -14,9 +16,9 @@ class TestInitialization(Test):
     def __init__(self):
         actions = [
             LaunchNeteaseMusic(),
-            Pause(2),
+            Pause.of(2),
             WaitUntilCPUFree(strict=True),
-            Pause(1),
+            Pause.of(1),
             HitSpaceKey(),
             QQLogin()
         ]
@@ -28,19 +30,16 @@ class StandardTest(Test):
         excel_context = ExcelPrepare()
         ppt_context = PPTPrepare()
         word_context = WordPrepare()
-        web_browsing = [LaunchBrowser()]
-        for page in BROWSE_PAGES:
-            if type(page) is tuple:
-                site, duration = page
-                web_browsing.append(OpenAndBrowse(site, duration))
-            else:
-                web_browsing.append(OpenAndBrowse(page, DEFAULT_BROWSING_TIME))
-        web_browsing.append(SearchWithBaiduAndBrowse("Geekerwan", 20))
-        web_browsing.append(Quit())
-        web_browsing.append(Pause(1))
+        web_browsing = [
+            LaunchBrowser(),
+            *(OpenAndBrowse(site, duration) for site, duration in _PAGES),
+            SearchWithBaiduAndBrowse("Geekerwan", 20),
+            Quit(),
+            Pause.of(1)
+        ]
         actions = [
             excel_context,
-            Pause(1),
+            Pause.of(1),
             TimerLoop(
                 "excel_calculate",
                 [
@@ -50,11 +49,11 @@ class StandardTest(Test):
                 ],
                 MS_WORK_DURATION
             ),
-            Pause(0.5),
+            Pause.of(0.5),
             HitEscapeKey(),
 
             ppt_context,
-            Pause(1),
+            Pause.of(1),
             TimerLoop(
                 "ppt_slideshow",
                 [
@@ -63,23 +62,23 @@ class StandardTest(Test):
                 ],
                 MS_WORK_DURATION
             ),
-            Pause(0.5),
+            Pause.of(0.5),
             HitEscapeKey(),
 
             word_context,
-            Pause(1),
+            Pause.of(1),
             TimerLoop("word_typewrite", [WordTypeNonsense()], MS_WORK_DURATION),
 
-            Pause(1),
+            Pause.of(1),
             TimerLoop("web_switch_page", web_browsing, TOTAL_BROWSING_TIME, should_not_stop_when=['quit', 'pause']),
             OpenAndBrowse("https://www.bilibili.com/video/BV1Af4y1f7NJ", 0),
-            Pause(VIDEO_WATCH_TIME),
+            Pause.of(VIDEO_WATCH_TIME),
             Quit(),
 
             WakeQQ(),
             WaitUntilCPUFree(),
             BotChat(QQ_CHAT_TIME),
-            Pause(1),
+            Pause.of(1),
             CloseWindow()
         ]
 